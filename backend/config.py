@@ -6,6 +6,7 @@ Uses Gemini as the AI backend.
 """
 
 import os
+from dataclasses import dataclass
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -14,6 +15,27 @@ env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(env_path)
 
 
+# Supported Cultures and Languages
+SUPPORTED_CULTURES: tuple[str, ...] = (
+    'Bengali', 'Hindi', 'Tamil', 'Japanese', 'Chinese',
+    'Korean', 'African', 'Norse', 'Greek', 'Egyptian',
+    'Celtic', 'Native American', 'Mayan', 'Persian', 'Arabic',
+    'Russian', 'Irish', 'Scottish', 'Vietnamese', 'Thai'
+)
+
+SUPPORTED_LANGUAGES: tuple[str, ...] = (
+    'English', 'Hindi', 'Bengali', 'Tamil', 'Telugu', 'Kannada', 'Punjabi',
+    'Spanish', 'French', 'German', 'Italian', 'Portuguese', 'Dutch', 'Russian'
+)
+
+STORY_THEMES: tuple[str, ...] = (
+    'myth', 'folklore', 'legend', 'moral tale',
+    'creation story', 'hero journey', 'love story',
+    'wisdom tale', 'trickster tale', 'nature spirit'
+)
+
+
+@dataclass(frozen=True, slots=True)
 class Config:
     """Application configuration loaded from environment variables."""
 
@@ -21,6 +43,11 @@ class Config:
     GEMINI_API_KEY: str = os.getenv('GEMINI_API_KEY', '')
     HF_API_KEY: str = os.getenv("HF_API_KEY", "")
 
+    # Groq API Settings
+    GROQ_API_KEY: str = os.getenv('GROQ_API_KEY', '')
+    GROQ_MODEL: str = os.getenv('GROQ_MODEL', 'llama-3.3-70b-versatile')
+    GROQ_FALLBACK_MODEL: str = os.getenv('GROQ_FALLBACK_MODEL', 'llama-3.1-8b-instant')
+
     # Server Settings
     HOST: str = os.getenv('HOST', '0.0.0.0')
     PORT: int = int(os.getenv('PORT', '8000'))
@@ -34,42 +61,26 @@ class Config:
     IMAGE_WIDTH: int = 1024
     IMAGE_HEIGHT: int = 576  # 16:9 aspect ratio
 
-    # Supported Cultures and Languages
-    SUPPORTED_CULTURES: list = [
-        'Bengali', 'Hindi', 'Tamil', 'Japanese', 'Chinese',
-        'Korean', 'African', 'Norse', 'Greek', 'Egyptian',
-        'Celtic', 'Native American', 'Mayan', 'Persian', 'Arabic',
-        'Russian', 'Irish', 'Scottish', 'Vietnamese', 'Thai'
-    ]
 
-    SUPPORTED_LANGUAGES: list = [
-        'English', 'Hindi', 'Bengali', 'Tamil', 'Telugu', 'Kannada', 'Punjabi',
-        'Spanish', 'French', 'German', 'Italian', 'Portuguese', 'Dutch', 'Russian'
-    ]
-
-    STORY_THEMES: list = [
-        'myth', 'folklore', 'legend', 'moral tale',
-        'creation story', 'hero journey', 'love story',
-        'wisdom tale', 'trickster tale', 'nature spirit'
-    ]
+# Singleton config instance
+config = Config()
 
-    @classmethod
-    def validate(cls) -> dict:
-        """Validate configuration and return status."""
-        issues = []
 
-        if not cls.GEMINI_API_KEY:
-            issues.append('GEMINI_API_KEY not set')
-        if not cls.HF_API_KEY:
-            issues.append("HF_API_KEY not set")
+def validate() -> dict:
+    """Validate configuration and return status."""
+    issues = []
 
+    if not config.GEMINI_API_KEY:
+        issues.append('GEMINI_API_KEY not set')
+    if not config.HF_API_KEY:
+        issues.append("HF_API_KEY not set")
 
-        return {
-            'valid': len(issues) == 0,
-            'issues': issues,
-            'gemini_configured': bool(cls.GEMINI_API_KEY)
-        }
+    return {
+        'valid': len(issues) == 0,
+        'issues': issues,
+        'gemini_configured': bool(config.GEMINI_API_KEY)
+    }
 
 
-# Singleton config instance
-config = Config()
+# Environment is only read at import time, so the validation result is fixed
+VALIDATION_RESULT = validate()
@@ -1,17 +1,16 @@
 import google.generativeai as genai
-from dotenv import load_dotenv
-import os
 
-# Load .env
-load_dotenv()
+from config import config
 
 # Configure Gemini
-genai.configure(api_key=os.getenv("GEMINI_API_KEY"))
+genai.configure(api_key=config.GEMINI_API_KEY)
 
-print("\nAvailable Gemini Models:\n")
 
-for model in genai.list_models():
-    print(f"Model name: {model.name}")
-    print(f"  Display name: {model.display_name}")
-    print(f"  Supported methods: {model.supported_generation_methods}")
-    print("-" * 60)
+if __name__ == "__main__":
+    print("\nAvailable Gemini Models:\n")
+
+    for model in genai.list_models():
+        print(f"Model name: {model.name}")
+        print(f"  Display name: {model.display_name}")
+        print(f"  Supported methods: {model.supported_generation_methods}")
+        print("-" * 60)
@@ -7,34 +7,53 @@ Audio (TTS) and Video (FFmpeg) services remain unchanged.
 """
 
 import os
+import re
 import sys
 import asyncio
+import orjson
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional
 from contextlib import asynccontextmanager
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse, JSONResponse
+from fastapi.responses import FileResponse, ORJSONResponse, Response
 from pydantic import BaseModel, Field
 
-from config import config
-from services.gemini_service import gemini_service
-from services.audio_service import audio_service
-from services.video_service import video_service
+from config import (
+    config, VALIDATION_RESULT, SUPPORTED_CULTURES, SUPPORTED_LANGUAGES, STORY_THEMES
+)
+from services.gemini_service import get_gemini_service
+from services.audio_service import get_audio_service
+from services.video_service import get_video_service
+from services.groq_service import get_groq_service
 from utils.file_handler import temp_file_handler, cleanup_temp_files
 
 
+# Characters stripped from titles before they are used as download filenames
+_SAFE_TITLE_RE = re.compile(r"[^A-Za-z0-9 _-]")
+
+# Allowed request values, checked by Pydantic before any Gemini call
+CultureName = Literal[SUPPORTED_CULTURES]
+LanguageName = Literal[SUPPORTED_LANGUAGES]
+ThemeName = Literal[STORY_THEMES]
+
+# Static configuration payloads, serialized once
+_CULTURES_JSON = orjson.dumps({"cultures": SUPPORTED_CULTURES})
+_LANGUAGES_JSON = orjson.dumps({"languages": SUPPORTED_LANGUAGES})
+_THEMES_JSON = orjson.dumps({"themes": STORY_THEMES})
+
+
 # ============================================================================
 # Request / Response Models
 # ============================================================================
 
 class GenerateRequest(BaseModel):
-    culture: str = Field(..., description="Cultural region")
-    language: str = Field(..., description="Output language")
-    theme: str = Field(..., description="Story theme")
+    culture: CultureName = Field(..., description="Cultural region")
+    language: LanguageName = Field(..., description="Output language")
+    theme: ThemeName = Field(..., description="Story theme")
     generate_textual: bool = Field(default=True)
     generate_video: bool = Field(default=False)
 
@@ -57,6 +76,7 @@ class VideoGenerateRequest(BaseModel):
     video_image: Optional[str] = None
     moral: Optional[str] = None
     enable_captions: bool = Field(default=False)
+    ken_burns: bool = Field(default=False)
     voice_style: str = Field(default="storyteller")
 
 
@@ -83,13 +103,15 @@ async def lifespan(app: FastAPI):
         await cleanup_task
     except asyncio.CancelledError:
         pass
+    if get_groq_service.cache_info().currsize:
+        await get_groq_service().aclose()
     cleanup_temp_files()
 
 
 async def periodic_cleanup():
     while True:
         await asyncio.sleep(300)
-        cleanup_temp_files()
+        await asyncio.to_thread(cleanup_temp_files)
 
 
 # ============================================================================
@@ -100,14 +122,15 @@ app = FastAPI(
     title="KathaChitra API",
     description="Cultural Storytelling Platform (Gemini-powered)",
     version="2.2.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
     allow_headers=["*"],
 )
 
@@ -118,24 +141,26 @@ app.add_middleware(
 
 @app.get("/health", response_model=HealthResponse, tags=["System"])
 async def health_check():
-    config_status = config.validate()
-
     return HealthResponse(
-        status="healthy" if config_status["valid"] else "degraded",
+        status="healthy" if VALIDATION_RESULT["valid"] else "degraded",
         version="2.2.0",
-        gemini_configured=config_status["gemini_configured"],
-        supported_cultures=config.SUPPORTED_CULTURES,
-        supported_languages=config.SUPPORTED_LANGUAGES,
-        story_themes=config.STORY_THEMES
+        gemini_configured=VALIDATION_RESULT["gemini_configured"],
+        supported_cultures=SUPPORTED_CULTURES,
+        supported_languages=SUPPORTED_LANGUAGES,
+        story_themes=STORY_THEMES
     )
 
 
 @app.post("/generate", response_model=GenerateResponse)
-async def generate(request: GenerateRequest):
+async def generate(request: GenerateRequest, fresh: bool = False):
 
     print("=== /generate called ===")
     print("Payload:", request)
 
+    if not request.generate_textual:
+        raise HTTPException(status_code=400, detail="Nothing to generate")
+
+    gemini_service = get_gemini_service()
     if not gemini_service.is_configured():
         print("Gemini NOT configured")
         raise HTTPException(status_code=503, detail="Gemini service not configured")
@@ -145,15 +170,12 @@ async def generate(request: GenerateRequest):
     story_data = await gemini_service.generate_story(
         culture=request.culture,
         language=request.language,
-        theme=request.theme
+        theme=request.theme,
+        use_cache=not fresh
     )
 
     print("Story generated successfully")
     print("Story keys:", story_data.keys())
-    story_image = None
-    video_image = None
-
-    
 
     return GenerateResponse(
         title=story_data["title"],
@@ -161,8 +183,8 @@ async def generate(request: GenerateRequest):
         language=request.language,
         story_text=story_data["story_text"],
         moral=story_data.get("moral"),
-        story_image=story_image,
-        video_image=video_image
+        story_image=None,
+        video_image=None
     )
 
     '''except Exception as e:
@@ -182,43 +204,42 @@ async def generate_video(
     session_dir = temp_file_handler.create_session_dir()
 
     try:
-        print("Generating narration...")
-        audio_path = await audio_service.generate_full_narration(
-            story_text=request.story_text,
-            language=request.language,
-            session_dir=session_dir,
-            voice_style=request.voice_style
+        video_service = get_video_service()
+
+        # Narration and image decoding are independent, so run them together
+        print("Generating narration and preparing image...")
+        audio_path, image_path = await asyncio.gather(
+            get_audio_service().generate_full_narration(
+                story_text=request.story_text,
+                language=request.language,
+                session_dir=session_dir,
+                voice_style=request.voice_style
+            ),
+            video_service.prepare_image(request.video_image, session_dir)
         )
 
         print("Creating video...")
         video_path = await video_service.create_story_video(
-            image_base64=request.video_image,
+            image_path=image_path,
             audio_path=audio_path,
             story_text=request.story_text,
             title=request.title,
             session_dir=session_dir,
-            enable_captions=request.enable_captions
+            enable_captions=request.enable_captions,
+            ken_burns=request.ken_burns
         )
 
         if not video_path or not video_path.exists():
             raise HTTPException(status_code=500, detail="Failed to create video")
 
-        def iterfile():
-            with open(video_path, "rb") as f:
-                yield from f
-
         background_tasks.add_task(temp_file_handler.cleanup_session, session_dir)
 
-        safe_title = "".join(
-            c for c in request.title if c.isascii() and (c.isalnum() or c in " -_")
-        )[:50] or "cultural_story"
+        safe_title = _SAFE_TITLE_RE.sub("", request.title)[:50] or "cultural_story"
 
-        return StreamingResponse(
-            iterfile(),
+        return FileResponse(
+            video_path,
             media_type="video/mp4",
-            headers={
-                "Content-Disposition": f'attachment; filename="{safe_title}_story.mp4"'
-            }
+            filename=f"{safe_title}_story.mp4"
         )
 
     except HTTPException:
@@ -232,22 +253,22 @@ async def generate_video(
 
 @app.get("/cultures", tags=["Configuration"])
 async def get_cultures():
-    return {"cultures": config.SUPPORTED_CULTURES}
+    return Response(content=_CULTURES_JSON, media_type="application/json")
 
 
 @app.get("/languages", tags=["Configuration"])
 async def get_languages():
-    return {"languages": config.SUPPORTED_LANGUAGES}
+    return Response(content=_LANGUAGES_JSON, media_type="application/json")
 
 
 @app.get("/themes", tags=["Configuration"])
 async def get_themes():
-    return {"themes": config.STORY_THEMES}
+    return Response(content=_THEMES_JSON, media_type="application/json")
 
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={
             "error": "InternalServerError",
@@ -8,13 +8,15 @@ Contains all AI service integrations:
 - Video: FFmpeg video composition
 """
 
-from .gemini_service import GeminiService, gemini_service
+from .gemini_service import GeminiService, get_gemini_service
 
-from .audio_service import AudioService, audio_service
-from .video_service import VideoService, video_service
+from .audio_service import AudioService, get_audio_service
+from .video_service import VideoService, get_video_service
+from .groq_service import GroqService, get_groq_service
 
 __all__ = [
-    "GeminiService", "gemini_service",
-    "AudioService", "audio_service",
-    "VideoService", "video_service"
+    "GeminiService", "get_gemini_service",
+    "AudioService", "get_audio_service",
+    "VideoService", "get_video_service",
+    "GroqService", "get_groq_service"
 ]
@@ -7,12 +7,28 @@ Generates emotional, expressive narration for story videos.
 """
 
 import asyncio
+import importlib.util
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, List
 
 from config import config
 
 
+# Characters that trip up TTS engines, mapped to plain equivalents
+_SANITIZE_TABLE = str.maketrans({
+    '\u2018': "'",    # Left single quote
+    '\u2019': "'",    # Right single quote
+    '\u201c': '"',    # Left double quote
+    '\u201d': '"',    # Right double quote
+    '\u2013': '-',    # En dash
+    '\u2014': '-',    # Em dash
+    '\u2026': '...',  # Ellipsis
+    '\u00a0': ' ',    # Non-breaking space
+    '\u00ad': '',     # Soft hyphen
+})
+
+
 class AudioService:
     """
     Audio narration engine for story videos.
@@ -66,57 +82,31 @@ class AudioService:
         self.use_gtts = self._check_gtts()
     
     def _check_edge_tts(self) -> bool:
-        """Check if edge-tts is available."""
-        try:
-            import edge_tts
-            return True
-        except ImportError:
-            return False
+        """Check if edge-tts is installed without importing it."""
+        return importlib.util.find_spec('edge_tts') is not None
     
     def _check_gtts(self) -> bool:
-        """Check if gTTS is available."""
-        try:
-            from gtts import gTTS
-            return True
-        except ImportError:
-            return False
+        """Check if gTTS is installed without importing it."""
+        return importlib.util.find_spec('gtts') is not None
     
-    def _get_language_code(self, language: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _get_language_code(language: str) -> str:
         """Convert language name to TTS language code."""
-        return self.LANGUAGE_CODES.get(language.lower(), 'en')
+        return AudioService.LANGUAGE_CODES.get(language.lower(), 'en')
     
-    def _get_edge_voice(self, lang_code: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _get_edge_voice(lang_code: str) -> str:
         """Get edge-tts voice for language."""
-        return self.EDGE_TTS_VOICES.get(lang_code, 'en-US-AriaNeural')
+        return AudioService.EDGE_TTS_VOICES.get(lang_code, 'en-US-AriaNeural')
     
     def _sanitize_text(self, text: str) -> str:
         """
         Sanitize text for TTS to avoid encoding issues.
         Removes problematic Unicode characters that cause latin-1 errors.
         """
-        import re
-        
-        # Replace common problematic characters
-        replacements = {
-            '\u2018': "'",    # Left single quote
-            '\u2019': "'",    # Right single quote
-            '\u201c': '"',    # Left double quote
-            '\u201d': '"',    # Right double quote
-            '\u2013': '-',    # En dash
-            '\u2014': '-',    # Em dash
-            '\u2026': '...',  # Ellipsis
-            '\u00a0': ' ',    # Non-breaking space
-            '\u00ad': '',     # Soft hyphen
-        }
-        
-        for old, new in replacements.items():
-            text = text.replace(old, new)
-        
-        # Remove any remaining non-ASCII characters for problematic languages
-        # Keep letters and basic punctuation
-        text = re.sub(r'[^\x00-\x7F]+', lambda m: m.group().encode('utf-8', errors='ignore').decode('utf-8', errors='ignore') if any(ord(c) > 127 for c in m.group()) else m.group(), text)
-        
-        return text
+        return text.translate(_SANITIZE_TABLE)
     
     async def generate_full_narration(
         self,
@@ -149,9 +139,7 @@ class AudioService:
         
         # Fallback to gTTS (does not support voice styles)
         if self.use_gtts:
-            loop = asyncio.get_event_loop()
-            success = await loop.run_in_executor(
-                None,
+            success = await asyncio.to_thread(
                 self._generate_audio_gtts,
                 story_text,
                 language,
@@ -263,5 +251,7 @@ class AudioService:
         return list(self.LANGUAGE_CODES.keys())
 
 
-# Singleton instance
-audio_service = AudioService()
+@lru_cache(maxsize=1)
+def get_audio_service() -> AudioService:
+    """Return the shared AudioService, created on first use."""
+    return AudioService()
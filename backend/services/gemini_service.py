@@ -6,19 +6,54 @@ Gemini Service for KathaChitra
 - Handles non-JSON / verbose outputs gracefully
 """
 
+import asyncio
 import json
-import re
-import google.generativeai as genai
+from functools import lru_cache
+from cachetools import TTLCache
 from config import config
 
-# Configure Gemini with API key
-genai.configure(api_key=config.GEMINI_API_KEY)
+# Shared decoder for scanning JSON objects out of free-form model output
+_DECODER = json.JSONDecoder()
+
+# Story prompt; filled with theme, culture and language per request
+_PROMPT_TEMPLATE = """
+Create a culturally authentic {theme} story.
+
+Rules:
+- Culture: {culture}
+- Language: {language}
+- Length: 400–600 words
+- Include a moral
+- Image prompts must be under 40 words
+- DO NOT include markdown
+- DO NOT include explanations
+- OUTPUT ONLY VALID JSON
+
+JSON format:
+{{
+  "title": "Story title",
+  "story_text": "Full story text",
+  "moral": "Moral of the story",
+  "story_image_prompt": "Visual description for main story image",
+  "video_image_prompt": "Visual description for background video image"
+}}
+"""
 
 
 class GeminiService:
     def __init__(self):
+        # Imported here so the SDK only loads on first use of the service
+        import google.generativeai as genai
+
+        genai.configure(api_key=config.GEMINI_API_KEY)
+
         # ✅ VERIFIED from your ListModels output
         self.model = genai.GenerativeModel("models/gemini-flash-latest")
+        self._configured = bool(config.GEMINI_API_KEY)
+
+        # Recent stories keyed by (culture, language, theme)
+        self._story_cache = TTLCache(maxsize=512, ttl=3600)
+        self._cache_lock = asyncio.Lock()
 
     def _extract_json(self, text: str) -> dict:
         """
@@ -28,17 +63,23 @@ class GeminiService:
         if not text:
             raise ValueError("Empty response from Gemini")
 
-        # Find first JSON object in the text
-        match = re.search(r"\{[\s\S]*\}", text)
-        if not match:
-            raise ValueError(f"No JSON found in Gemini output:\n{text}")
-
-        try:
-            return json.loads(match.group())
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Invalid JSON extracted: {e}")
-
-    async def generate_story(self, culture: str, language: str, theme: str) -> dict:
+        # Parse from each '{' until one decodes to a complete JSON object
+        idx = text.find("{")
+        while idx != -1:
+            try:
+                data, _ = _DECODER.raw_decode(text, idx)
+            except json.JSONDecodeError:
+                idx = text.find("{", idx + 1)
+                continue
+            if isinstance(data, dict):
+                return data
+            idx = text.find("{", idx + 1)
+
+        raise ValueError(f"No JSON found in Gemini output:\n{text}")
+
+    async def generate_story(
+        self, culture: str, language: str, theme: str, use_cache: bool = True
+    ) -> dict:
         """
         Generate a culturally grounded story and image prompts.
         Returns a dictionary with:
@@ -47,32 +88,30 @@ class GeminiService:
         - moral
         - story_image_prompt
         - video_image_prompt
+
+        Results are cached for an hour per (culture, language, theme);
+        pass use_cache=False to force a fresh story.
         """
+        key = (culture, language, theme)
 
-        prompt = f"""
-Create a culturally authentic {theme} story.
+        if use_cache:
+            async with self._cache_lock:
+                cached = self._story_cache.get(key)
+            if cached is not None:
+                return dict(cached)
 
-Rules:
-- Culture: {culture}
-- Language: {language}
-- Length: 400–600 words
-- Include a moral
-- Image prompts must be under 40 words
-- DO NOT include markdown
-- DO NOT include explanations
-- OUTPUT ONLY VALID JSON
+        data = await self._generate_story(culture, language, theme)
 
-JSON format:
-{{
-  "title": "Story title",
-  "story_text": "Full story text",
-  "moral": "Moral of the story",
-  "story_image_prompt": "Visual description for main story image",
-  "video_image_prompt": "Visual description for background video image"
-}}
-"""
+        async with self._cache_lock:
+            self._story_cache[key] = data
+
+        return dict(data)
+
+    async def _generate_story(self, culture: str, language: str, theme: str) -> dict:
+        """Call Gemini and validate the returned story JSON."""
+        prompt = _PROMPT_TEMPLATE.format(theme=theme, culture=culture, language=language)
 
-        response = self.model.generate_content(prompt)
+        response = await self.model.generate_content_async(prompt)
 
         # ✅ Correct way to read Gemini output
         try:
@@ -98,8 +137,10 @@ JSON format:
 
     def is_configured(self) -> bool:
         """Check if Gemini API key is available."""
-        return bool(config.GEMINI_API_KEY)
+        return self._configured
 
 
-# Singleton instance
-gemini_service = GeminiService()
+@lru_cache(maxsize=1)
+def get_gemini_service() -> GeminiService:
+    """Return the shared GeminiService, created on first use."""
+    return GeminiService()
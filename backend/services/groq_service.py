@@ -7,16 +7,117 @@ Handles text generation using Groq API with LLaMA/Mixtral models.
 - Two image prompts: story illustration + video background
 """
 
-import json
+import asyncio
+import hashlib
+import importlib.util
 import re
 import random
 import time
-from typing import Dict, Optional
-from groq import Groq
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import httpx
+import orjson
+from cachetools import TTLCache
 
 from config import config
 
 
+# Groq's OpenAI-compatible chat completions endpoint
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Retry policy for transient Groq failures (rate limits, 5xx, network errors)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8.0
+
+# Outermost {...} block in free-form fallback model output
+_JSON_BLOCK = re.compile(r'\{[\s\S]*\}')
+
+
+class CircuitOpenError(Exception):
+    """Raised when Groq calls are short-circuited by an open breaker."""
+
+
+class GroqBreaker:
+    """
+    Circuit breaker for Groq calls.
+    
+    CLOSED: calls pass through; failures inside the window are counted.
+    OPEN: calls fail fast with CircuitOpenError until the open period ends.
+    HALF_OPEN: a single probe call is let through. Success closes the
+    breaker, failure reopens it with the open period doubled.
+    """
+    
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        window_seconds: float = 30.0,
+        open_seconds: float = 30.0,
+        max_open_seconds: float = 300.0
+    ):
+        self.failure_threshold = failure_threshold
+        self.window_seconds = window_seconds
+        self.base_open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        
+        self.state = self.CLOSED
+        self.failure_count = 0
+        self.opened_at = 0.0
+        self._open_seconds = open_seconds
+        self._window_start = 0.0
+        self._probe_in_flight = False
+    
+    def before_call(self):
+        """Raise CircuitOpenError if the call should not reach Groq."""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self._open_seconds:
+                raise CircuitOpenError("Groq circuit is open")
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                raise CircuitOpenError("Groq circuit is half-open, probe in flight")
+            self._probe_in_flight = True
+    
+    def record_success(self):
+        """Close the breaker and reset failure tracking."""
+        self.state = self.CLOSED
+        self.failure_count = 0
+        self._open_seconds = self.base_open_seconds
+        self._probe_in_flight = False
+    
+    def record_failure(self):
+        """Count a failure, opening the breaker when the threshold is hit."""
+        now = time.monotonic()
+        
+        if self.state == self.HALF_OPEN:
+            self._open_seconds = min(self._open_seconds * 2, self.max_open_seconds)
+            self._trip(now)
+            return
+        
+        if now - self._window_start > self.window_seconds:
+            self._window_start = now
+            self.failure_count = 0
+        
+        self.failure_count += 1
+        if self.failure_count >= self.failure_threshold:
+            self._trip(now)
+    
+    def _trip(self, now: float):
+        """Move to OPEN starting at the given time."""
+        print(f"Groq circuit opened for {self._open_seconds:.0f}s")
+        self.state = self.OPEN
+        self.opened_at = now
+        self.failure_count = 0
+        self._probe_in_flight = False
+
+
 class GroqService:
     """
     Text and reasoning engine using Groq API.
@@ -38,12 +139,130 @@ class GroqService:
     ]
     
     def __init__(self):
-        """Initialize Groq client with API key."""
-        self.client = None
+        """Initialize a pooled async HTTP client for the Groq API."""
+        self._client = None
         if config.GROQ_API_KEY:
-            self.client = Groq(api_key=config.GROQ_API_KEY)
+            self._client = httpx.AsyncClient(
+                # HTTP/2 needs the optional h2 package (httpx[http2])
+                http2=importlib.util.find_spec('h2') is not None,
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                headers={
+                    "Authorization": f"Bearer {config.GROQ_API_KEY}",
+                    "Content-Type": "application/json"
+                }
+            )
         self.model = config.GROQ_MODEL
         self.fallback_model = config.GROQ_FALLBACK_MODEL
+        self._breaker = GroqBreaker()
+        
+        # Image prompts keyed by (story excerpt digest, culture), plus the most
+        # recent prompt per culture to serve while the breaker is open
+        self._image_prompt_cache = TTLCache(maxsize=1024, ttl=3600)
+        self._last_image_prompt: Dict[str, str] = {}
+        self._cache_lock = asyncio.Lock()
+    
+    async def _chat_completion(
+        self,
+        model: str,
+        messages: List[Dict],
+        temperature: float,
+        max_tokens: int,
+        response_format: Optional[Dict] = None
+    ) -> str:
+        """
+        POST a chat completion request and return the message content.
+        Raises httpx.HTTPStatusError on non-2xx responses.
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        }
+        if response_format:
+            payload["response_format"] = response_format
+        
+        response = await self._call_with_retry(payload)
+        return orjson.loads(response.content)["choices"][0]["message"]["content"]
+    
+    async def _call_with_retry(self, payload: Dict, max_attempts: int = 4) -> httpx.Response:
+        """
+        POST to Groq, retrying rate limits, 5xx responses and transport errors
+        with exponential backoff and full jitter. Other errors are raised as-is.
+        
+        Raises CircuitOpenError without calling Groq while the breaker is open.
+        """
+        self._breaker.before_call()
+        
+        groq_healthy = False
+        try:
+            for attempt in range(max_attempts):
+                try:
+                    response = await self._client.post(
+                        GROQ_CHAT_URL, content=orjson.dumps(payload)
+                    )
+                    response.raise_for_status()
+                    groq_healthy = True
+                    return response
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in RETRYABLE_STATUS_CODES:
+                        # Groq answered; the request itself was rejected
+                        groq_healthy = True
+                        raise
+                    if attempt == max_attempts - 1:
+                        raise
+                    delay = self._get_retry_after(e.response)
+                except httpx.TransportError:
+                    if attempt == max_attempts - 1:
+                        raise
+                    delay = None
+                
+                if delay is None:
+                    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+                
+                print(f"Groq request failed (attempt {attempt + 1}/{max_attempts}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+        finally:
+            if groq_healthy:
+                self._breaker.record_success()
+            else:
+                self._breaker.record_failure()
+    
+    async def gather_generations(self, tasks: List[Dict], timeout: float = 60.0) -> List[Dict]:
+        """
+        Run independent chat completions concurrently over the shared client.
+        
+        Args:
+            tasks: Keyword arguments for _chat_completion, one dict per call
+            timeout: Per-task timeout in seconds
+            
+        Returns:
+            One dict per task, in order, with "content" on success or "error" on failure
+        """
+        if not self._client:
+            raise ValueError("Groq API key not configured")
+        
+        async def run(task: Dict) -> Dict:
+            try:
+                content = await asyncio.wait_for(self._chat_completion(**task), timeout)
+                return {"content": content, "error": None}
+            except Exception as e:
+                return {"content": None, "error": str(e) or type(e).__name__}
+        
+        return list(await asyncio.gather(*(run(task) for task in tasks)))
+    
+    def _get_retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Read a Retry-After header given in seconds, if present."""
+        try:
+            return max(0.0, float(response.headers["retry-after"]))
+        except (KeyError, ValueError):
+            return None
+    
+    async def aclose(self):
+        """Close the underlying HTTP connection pool."""
+        if self._client is not None:
+            await self._client.aclose()
     
     def _get_random_seed(self) -> str:
         """Generate a unique seed for story variety."""
@@ -68,7 +287,7 @@ class GroqService:
         Returns:
             Dictionary with title, story_text, moral, story_image_prompt, video_image_prompt
         """
-        if not self.client:
+        if not self._client:
             raise ValueError("Groq API key not configured")
         
         seed = self._get_random_seed()
@@ -78,7 +297,7 @@ class GroqService:
         user_prompt = self._get_story_user_prompt(culture, language, theme, seed, angle)
         
         try:
-            response = self.client.chat.completions.create(
+            content = await self._chat_completion(
                 model=self.model,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -89,8 +308,7 @@ class GroqService:
                 response_format={"type": "json_object"}
             )
             
-            content = response.choices[0].message.content
-            story_data = json.loads(content)
+            story_data = orjson.loads(content)
             
             story_text = story_data.get("story_text", "")
             if len(story_text) < 100:
@@ -104,6 +322,9 @@ class GroqService:
                 "video_image_prompt": story_data.get("video_image_prompt", "")
             }
             
+        except CircuitOpenError as e:
+            print(f"{e}, using template story")
+            return self._get_template_story(culture, theme)
         except Exception as e:
             print(f"Primary generation failed: {e}, trying fallback...")
             return await self._generate_story_fallback(culture, language, theme)
@@ -115,7 +336,7 @@ class GroqService:
         theme: str
     ) -> Dict:
         """Fallback story generation with simpler prompt."""
-        if not self.client:
+        if not self._client:
             raise ValueError("Groq API key not configured")
         
         seed = self._get_random_seed()
@@ -133,17 +354,16 @@ OUTPUT (JSON only):
 }}"""
         
         try:
-            response = self.client.chat.completions.create(
+            content = await self._chat_completion(
                 model=self.fallback_model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.9,
                 max_tokens=3000
             )
             
-            content = response.choices[0].message.content
-            json_match = re.search(r'\{[\s\S]*\}', content)
+            json_match = _JSON_BLOCK.search(content)
             if json_match:
-                story_data = json.loads(json_match.group())
+                story_data = orjson.loads(json_match.group())
                 return {
                     "title": story_data.get("title", "Untitled Story"),
                     "story_text": story_data.get("story_text", ""),
@@ -151,11 +371,33 @@ OUTPUT (JSON only):
                     "story_image_prompt": story_data.get("story_image_prompt", ""),
                     "video_image_prompt": story_data.get("video_image_prompt", "")
                 }
+        except CircuitOpenError as e:
+            print(f"{e}, using template story")
+            return self._get_template_story(culture, theme)
         except Exception as fallback_error:
             print(f"Fallback also failed: {fallback_error}")
         
         raise Exception("Story generation failed")
     
+    def _get_template_story(self, culture: str, theme: str) -> Dict:
+        """Deterministic story used while Groq is unavailable."""
+        return {
+            "title": f"A {theme.title()} of the {culture} People",
+            "story_text": (
+                f"Long ago, in a village of the {culture} lands, the elders would gather "
+                f"the children at dusk to share a {theme} passed down through generations. "
+                "They spoke of a humble traveller who arrived with nothing but kindness, "
+                "and of how the villagers who welcomed the stranger were rewarded with "
+                "wisdom that carried them through the hardest seasons. Those who turned "
+                "the traveller away learned, in time, that generosity returns to those "
+                "who give it freely. And so the story is still told, so that every "
+                "generation remembers what the elders learned."
+            ),
+            "moral": "Kindness offered freely is never wasted.",
+            "story_image_prompt": f"A humble traveller welcomed into a {culture} village at dusk, digital art",
+            "video_image_prompt": f"Peaceful {culture} village landscape at dusk, atmospheric, no people"
+        }
+    
     def _get_story_system_prompt(self, culture: str, language: str) -> str:
         """System prompt focusing on variety and cultural authenticity."""
         
@@ -201,20 +443,31 @@ IMPORTANT:
         story_text: str,
         culture: str
     ) -> str:
-        """Generate a simple image prompt from story text."""
-        if not self.client:
+        """
+        Generate a simple image prompt from story text.
+        Results are cached per (story excerpt, culture).
+        """
+        if not self._client:
             return f"{culture} cultural scene, traditional art"
         
+        excerpt = story_text[:800]
+        key = (hashlib.blake2b(excerpt.encode()).digest(), culture)
+        
+        async with self._cache_lock:
+            cached = self._image_prompt_cache.get(key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""Create a simple image prompt (under 50 words) for this story.
 Focus on: main character, key action, {culture} setting.
 
-Story excerpt: {story_text[:800]}
+Story excerpt: {excerpt}
 
 OUTPUT (JSON):
 {{"image_prompt": "your prompt here"}}"""
         
         try:
-            response = self.client.chat.completions.create(
+            content = await self._chat_completion(
                 model=self.model,
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.6,
@@ -222,16 +475,31 @@ OUTPUT (JSON):
                 response_format={"type": "json_object"}
             )
             
-            data = json.loads(response.choices[0].message.content)
-            return data.get("image_prompt", f"{culture} cultural illustration")
+            data = orjson.loads(content)
+            image_prompt = data.get("image_prompt")
+            if not image_prompt:
+                return f"{culture} cultural illustration"
+            
+            async with self._cache_lock:
+                self._image_prompt_cache[key] = image_prompt
+                self._last_image_prompt[culture] = image_prompt
+            return image_prompt
             
+        except CircuitOpenError:
+            # Serve a stale prompt for this culture rather than a generic one
+            stale = self._last_image_prompt.get(culture)
+            if stale:
+                return stale
+            return f"{culture} cultural scene, traditional style"
         except Exception:
             return f"{culture} cultural scene, traditional style"
     
     def is_configured(self) -> bool:
         """Check if Groq service is properly configured."""
-        return self.client is not None
+        return self._client is not None
 
 
-# Singleton instance
-groq_service = GroqService()
+@lru_cache(maxsize=1)
+def get_groq_service() -> GroqService:
+    """Return the shared GroqService, created on first use."""
+    return GroqService()
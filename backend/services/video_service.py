@@ -5,19 +5,34 @@ Handles video generation using FFmpeg.
 Creates story videos with:
 - Image background (with optional Ken Burns effect)
 - Emotional audio narration
-- Optional caption overlay
+- Optional soft caption track
 - Downloadable MP4 format
 """
 
 import asyncio
 import base64
-import subprocess
+import hashlib
+import os
+import re
+import shutil
+import struct
 import textwrap
+import uuid
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 from io import BytesIO
 
 from config import config
+from utils.file_handler import CACHE_DIR_NAME
+
+
+# Cached still tracks: a short encoded segment, stream-copied up to the full length
+SILENT_SEGMENT_SECONDS = 10
+SILENT_TRACK_SECONDS = 900
+
+# Sentence boundaries used to segment captions
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
 
 
 class VideoService:
@@ -26,46 +41,160 @@ class VideoService:
     Creates narrated story videos with optional captions.
     """
     
+    # H.264 encoders in order of preference with their output options;
+    # libx264 is the CPU fallback and is always available
+    VIDEO_ENCODERS = {
+        'h264_nvenc': ['-preset', 'p1', '-rc', 'vbr', '-cq', '28', '-pix_fmt', 'yuv420p'],
+        'h264_qsv': ['-preset', 'veryfast', '-pix_fmt', 'nv12'],
+        'h264_videotoolbox': ['-pix_fmt', 'yuv420p'],
+        'libx264': ['-preset', 'veryfast', '-tune', 'stillimage', '-pix_fmt', 'yuv420p'],
+    }
+    
     def __init__(self):
         """Initialize video service."""
         self.fps = 24
         self.video_size = (config.IMAGE_WIDTH, config.IMAGE_HEIGHT)
+        
+        # Bulkhead: cap concurrent FFmpeg encodes and split cores between them
+        cpu_count = os.cpu_count() or 2
+        encode_slots = max(1, cpu_count // 2)
+        self._encode_sem = asyncio.Semaphore(encode_slots)
+        self._encode_threads = max(1, cpu_count // encode_slots)
+        
+        # Resolve FFmpeg binaries once rather than on every call
+        self._ffmpeg_exe = self._find_ffmpeg()
+        self._has_ffmpeg = self._ffmpeg_exe is not None
+        self._ffprobe_exe = None
+        if self._has_ffmpeg:
+            self._ffprobe_exe = shutil.which('ffprobe') or self._ffmpeg_exe.replace('ffmpeg', 'ffprobe')
+        
+        # Encoder is probed on first use; see _ensure_video_codec
+        self._vcodec = 'libx264'
+        self._vcodec_probed = False
+        self._vcodec_lock = asyncio.Lock()
+    
+    def _find_ffmpeg(self) -> Optional[str]:
+        """Locate the FFmpeg executable bundled with imageio-ffmpeg."""
+        try:
+            import imageio_ffmpeg
+            return imageio_ffmpeg.get_ffmpeg_exe()
+        except Exception:
+            return None
+    
+    async def _ensure_video_codec(self):
+        """Probe for a usable encoder once, without blocking the event loop."""
+        if self._vcodec_probed:
+            return
+        async with self._vcodec_lock:
+            if not self._vcodec_probed:
+                self._vcodec = await self._probe_video_codec()
+                self._vcodec_probed = True
+    
+    async def _probe_video_codec(self) -> str:
+        """
+        Pick the first preferred encoder that FFmpeg lists and can open.
+        A one-frame test encode rules out encoders built in without the hardware.
+        """
+        if not self._has_ffmpeg:
+            return 'libx264'
+        
+        try:
+            _, listed, _ = await self._run_command(
+                [self._ffmpeg_exe, '-hide_banner', '-encoders'], timeout=10
+            )
+            
+            for codec, args in self.VIDEO_ENCODERS.items():
+                if codec == 'libx264':
+                    break
+                if f" {codec} " not in listed:
+                    continue
+                returncode, _, _ = await self._run_command(
+                    [
+                        self._ffmpeg_exe, '-hide_banner',
+                        '-f', 'lavfi', '-i', 'color=black:s=256x256:d=0.1',
+                        '-frames:v', '1', '-c:v', codec, *args,
+                        '-f', 'null', '-'
+                    ],
+                    timeout=15
+                )
+                if returncode == 0:
+                    print(f"Using hardware video encoder: {codec}")
+                    return codec
+                    
+        except Exception as e:
+            print(f"Video encoder probe failed: {e}")
+        
+        return 'libx264'
+    
+    def _video_codec_args(self) -> list:
+        """FFmpeg video encoder arguments for the selected codec."""
+        return [
+            '-c:v', self._vcodec,
+            '-threads', str(self._encode_threads),
+            *self.VIDEO_ENCODERS[self._vcodec]
+        ]
+    
+    async def prepare_image(
+        self,
+        image_base64: Optional[str],
+        session_dir: Path
+    ) -> Optional[Path]:
+        """
+        Decode and resize the background image off the event loop.
+        
+        Args:
+            image_base64: Base64 encoded background image
+            session_dir: Directory for temporary files
+            
+        Returns:
+            Path to the saved image or None on failure
+        """
+        image_path = session_dir / "story_image.png"
+        saved_path = await asyncio.to_thread(self._save_base64_image, image_base64, image_path)
+        
+        if saved_path and saved_path.exists():
+            return saved_path
+        return None
     
     async def create_story_video(
         self,
-        image_base64: str,
+        image_path: Optional[Path],
         audio_path: Optional[Path],
         story_text: str,
         title: str,
         session_dir: Path,
-        enable_captions: bool = False
+        enable_captions: bool = False,
+        ken_burns: bool = False
     ) -> Optional[Path]:
         """
         Create a story video with image, audio, and optional captions.
         
         Args:
-            image_base64: Base64 encoded background image
+            image_path: Background image prepared by prepare_image()
             audio_path: Path to narration audio file
             story_text: Story text for captions
             title: Story title
             session_dir: Directory for temporary files
-            enable_captions: Whether to overlay caption text
+            enable_captions: Whether to add a caption track
+            ken_burns: Whether to apply the slow zoom effect (costly per frame)
             
         Returns:
             Path to generated video file or None
         """
         try:
-            # Save image to file
-            image_path = session_dir / "story_image.png"
-            self._save_base64_image(image_base64, image_path)
-            
-            if not image_path.exists():
+            if not image_path or not image_path.exists():
                 print("Failed to save story image")
                 return None
             
+            await self._ensure_video_codec()
+            
             # Determine video duration from audio
+            audio_duration = None
             if audio_path and audio_path.exists():
-                duration = await self._get_audio_duration(audio_path)
+                audio_duration = await self._get_audio_duration(audio_path)
+                duration = audio_duration
+                if duration is None:
+                    duration = self._estimate_audio_duration(audio_path)
                 if duration is None or duration < 5:
                     duration = 30
                 duration += 2  # Padding
@@ -89,7 +218,9 @@ class VideoService:
                 audio_path=audio_path,
                 subtitle_path=subtitle_path,
                 output_path=output_path,
-                duration=duration
+                duration=duration,
+                ken_burns=ken_burns,
+                audio_duration=audio_duration
             )
             
             if success and output_path.exists():
@@ -115,11 +246,12 @@ class VideoService:
             subtitle_path = session_dir / "captions.srt"
             
             # Split text into sentences first for natural pausing
-            import re
-            sentences = re.split(r'(?<=[.!?])\s+', story_text)
+            sentences = _SENTENCE_SPLIT.split(story_text)
             
             # Create caption segments (aim for ~6-8 words per caption for readability)
+            # Word counts are kept alongside so timing needs no re-split
             segments = []
+            word_counts = []
             for sentence in sentences:
                 words = sentence.split()
                 # Break long sentences into smaller chunks
@@ -127,21 +259,20 @@ class VideoService:
                     chunk_words = words[i:i + 8]
                     if chunk_words:
                         segments.append(" ".join(chunk_words))
+                        word_counts.append(len(chunk_words))
             
             if len(segments) == 0:
                 return None
             
             # Calculate timing based on reading speed (~150 words per minute)
             # This makes captions sync better with narration
-            total_words = len(story_text.split())
             words_per_second = 2.5  # ~150 words per minute = 2.5 words/sec
             
             # Calculate time per segment based on word count
             segment_times = []
             current_time = 0.5  # Small delay at start
             
-            for segment in segments:
-                word_count = len(segment.split())
+            for word_count in word_counts:
                 # Duration based on word count, minimum 1.5 seconds
                 segment_duration = max(word_count / words_per_second, 1.5)
                 segment_times.append((current_time, current_time + segment_duration))
@@ -152,18 +283,14 @@ class VideoService:
                 scale = (duration - 1) / segment_times[-1][1]
                 segment_times = [(s * scale, e * scale) for s, e in segment_times]
             
-            # Write SRT file
-            with open(subtitle_path, 'w', encoding='utf-8') as f:
-                for i, (segment, (start_time, end_time)) in enumerate(zip(segments, segment_times)):
-                    start_str = self._format_srt_time(start_time)
-                    end_str = self._format_srt_time(end_time)
-                    
-                    # Wrap long lines
-                    wrapped = textwrap.fill(segment, width=45)
-                    
-                    f.write(f"{i + 1}\n")
-                    f.write(f"{start_str} --> {end_str}\n")
-                    f.write(f"{wrapped}\n\n")
+            # Build the whole SRT in memory and write it once
+            entries = [
+                f"{i}\n"
+                f"{self._format_srt_time(start_time)} --> {self._format_srt_time(end_time)}\n"
+                f"{textwrap.fill(segment, width=45)}\n\n"
+                for i, (segment, (start_time, end_time)) in enumerate(zip(segments, segment_times), 1)
+            ]
+            subtitle_path.write_text("".join(entries), encoding='utf-8')
             
             print(f"Created subtitles: {len(segments)} segments, synced to {duration:.1f}s")
             return subtitle_path
@@ -172,6 +299,34 @@ class VideoService:
             print(f"Subtitle creation failed: {e}")
             return None
     
+    async def _run_command(self, cmd: list, timeout: Optional[float] = None) -> Tuple[int, str, str]:
+        """
+        Run a command as an asyncio subprocess.
+        Returns (returncode, stdout, stderr); the process is killed on timeout.
+        """
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            raise
+        
+        return (
+            proc.returncode,
+            stdout.decode(errors='replace'),
+            stderr.decode(errors='replace')
+        )
+    
+    async def _run_encode(self, cmd: list) -> Tuple[int, str, str]:
+        """Run an FFmpeg encode once a bulkhead slot is free."""
+        async with self._encode_sem:
+            return await self._run_command(cmd, timeout=300)
+    
     def _format_srt_time(self, seconds: float) -> str:
         """Format seconds to SRT timestamp format."""
         hours = int(seconds // 3600)
@@ -180,151 +335,382 @@ class VideoService:
         millis = int((seconds % 1) * 1000)
         return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
     
-    def _save_base64_image(self, image_base64: str, output_path: Path) -> bool:
-        """Save base64 image to file."""
+    def _get_header_size(self, data: bytes) -> Optional[Tuple[str, Tuple[int, int]]]:
+        """
+        Read (file suffix, (width, height)) from a PNG or baseline/progressive
+        JPEG header without decoding the image. Returns None if unrecognised.
+        """
+        # PNG: signature, then IHDR chunk with big-endian width and height
+        if data[:8] == b'\x89PNG\r\n\x1a\n' and data[12:16] == b'IHDR':
+            width, height = struct.unpack('>II', data[16:24])
+            return '.png', (width, height)
+        
+        # JPEG: walk marker segments until a start-of-frame marker
+        if data[:2] == b'\xff\xd8':
+            i = 2
+            while i + 9 <= len(data):
+                if data[i] != 0xFF:
+                    return None
+                marker = data[i + 1]
+                if marker == 0xFF:
+                    i += 1
+                    continue
+                if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                    height, width = struct.unpack('>HH', data[i + 5:i + 9])
+                    return '.jpg', (width, height)
+                segment_length = struct.unpack('>H', data[i + 2:i + 4])[0]
+                i += 2 + segment_length
+        
+        return None
+    
+    def _save_base64_image(self, image_base64: str, output_path: Path) -> Optional[Path]:
+        """
+        Save base64 image to file, resized to the video size.
+        Images already at the right size are written without re-encoding,
+        keeping their original format. Returns the written path or None.
+        """
         try:
+            image_data = base64.b64decode(image_base64)
+            
+            header = self._get_header_size(image_data)
+            if header and header[1] == self.video_size:
+                raw_path = output_path.with_suffix(header[0])
+                raw_path.write_bytes(image_data)
+                return raw_path
+            
             from PIL import Image
             
-            image_data = base64.b64decode(image_base64)
+            # BytesIO shares the decoded buffer rather than copying it
             img = Image.open(BytesIO(image_data))
+            # Let the JPEG decoder downscale via DCT while decoding (no-op for PNG)
+            img.draft('RGB', self.video_size)
             
             if img.size != self.video_size:
-                img = img.resize(self.video_size, Image.Resampling.LANCZOS)
+                # Bilinear is indistinguishable from Lanczos after H.264 compression
+                img = img.resize(self.video_size, Image.Resampling.BILINEAR)
             
             img.save(str(output_path), 'PNG')
-            return True
+            return output_path
             
         except Exception as e:
             print(f"Failed to save image: {e}")
-            return False
+            return None
     
     async def _get_audio_duration(self, audio_path: Path) -> Optional[float]:
-        """Get duration of audio file in seconds."""
+        """
+        Get duration of audio file in seconds.
+        Reads the container header with mutagen when available and only
+        spawns ffprobe for formats it cannot parse.
+        """
         try:
-            import imageio_ffmpeg
-            
-            ffprobe_exe = imageio_ffmpeg.get_ffmpeg_exe().replace('ffmpeg', 'ffprobe')
+            from mutagen import File as MutagenFile
             
+            audio = MutagenFile(str(audio_path))
+            if audio is not None and audio.info.length > 0:
+                return float(audio.info.length)
+        except Exception:
+            pass
+        
+        try:
             cmd = [
-                ffprobe_exe,
+                self._ffprobe_exe,
                 '-v', 'error',
                 '-show_entries', 'format=duration',
                 '-of', 'default=noprint_wrappers=1:nokey=1',
                 str(audio_path)
             ]
             
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: subprocess.run(cmd, capture_output=True, text=True)
-            )
+            returncode, stdout, _ = await self._run_command(cmd)
             
-            if result.returncode == 0 and result.stdout.strip():
-                return float(result.stdout.strip())
+            if returncode == 0 and stdout.strip():
+                return float(stdout.strip())
                 
         except Exception as e:
             print(f"Could not get audio duration: {e}")
         
-        # Fallback: estimate from file size
-        try:
-            size = audio_path.stat().st_size
-            return size / 16000
-        except:
-            pass
-        
         return None
     
+    def _estimate_audio_duration(self, audio_path: Path) -> Optional[float]:
+        """Rough duration from file size, for audio that could not be probed."""
+        try:
+            return audio_path.stat().st_size / 16000
+        except OSError:
+            return None
+    
     async def _create_video_ffmpeg(
         self,
         image_path: Path,
         audio_path: Optional[Path],
         subtitle_path: Optional[Path],
         output_path: Path,
-        duration: float
+        duration: float,
+        ken_burns: bool = False,
+        audio_duration: Optional[float] = None
     ) -> bool:
-        """Create video using FFmpeg with optional captions."""
+        """
+        Create video using FFmpeg with optional captions and zoom effect.
+        `audio_duration` is the probed narration length, or None if unknown.
+        """
         try:
-            import imageio_ffmpeg
-            
-            ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-            
-            # Build filter chain
+            # Build filter chain. The image is already resized to video_size,
+            # so without effects the still frame is encoded as-is.
             filters = []
             
-            # Scale and pad for consistent size
-            filters.append(f"scale={self.video_size[0]}:{self.video_size[1]}:force_original_aspect_ratio=decrease")
-            filters.append(f"pad={self.video_size[0]}:{self.video_size[1]}:(ow-iw)/2:(oh-ih)/2")
-            
-            # Subtle zoom effect
-            filters.append(f"zoompan=z='min(zoom+0.0003,1.08)':d=1:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={self.video_size[0]}x{self.video_size[1]}:fps={self.fps}")
-            
-            # Add captions if subtitle file exists
-            if subtitle_path and subtitle_path.exists():
-                # Escape path for FFmpeg
-                sub_path_escaped = str(subtitle_path).replace("\\", "/").replace(":", "\\:")
-                filters.append(f"subtitles='{sub_path_escaped}':force_style='FontSize=22,FontName=DejaVu Sans,PrimaryColour=&HFFFFFF,OutlineColour=&H000000,Outline=2,Shadow=1,MarginV=40'")
-            
-            filter_chain = ",".join(filters)
-            
-            # Build command
-            if audio_path and audio_path.exists():
-                cmd = [
-                    ffmpeg_exe,
-                    '-y',
-                    '-loop', '1',
-                    '-i', str(image_path),
-                    '-i', str(audio_path),
-                    '-c:v', 'libx264',
-                    '-tune', 'stillimage',
-                    '-c:a', 'aac',
-                    '-b:a', '192k',
-                    '-pix_fmt', 'yuv420p',
-                    '-vf', filter_chain,
-                    '-shortest',
-                    '-movflags', '+faststart',
-                    str(output_path)
-                ]
-            else:
+            if ken_burns:
+                # Scale and pad for consistent size
+                filters.append(f"scale={self.video_size[0]}:{self.video_size[1]}:force_original_aspect_ratio=decrease")
+                filters.append(f"pad={self.video_size[0]}:{self.video_size[1]}:(ow-iw)/2:(oh-ih)/2")
+                
+                # Subtle zoom effect
+                filters.append(f"zoompan=z='min(zoom+0.0003,1.08)':d=1:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={self.video_size[0]}x{self.video_size[1]}:fps={self.fps}")
+            
+            filter_args = ['-vf', ",".join(filters)] if filters else []
+            
+            # Captions are muxed as a soft mov_text track from a separate SRT
+            # input, so they never touch the filter graph or the video encode
+            has_captions = subtitle_path is not None and subtitle_path.exists()
+            
+            if not (audio_path and audio_path.exists()):
+                if has_captions:
+                    subtitle_args = [
+                        '-f', 'srt', '-i', str(subtitle_path),
+                        '-map', '0:v', '-map', '1:s',
+                        '-c:s', 'mov_text', '-disposition:s:0', 'default'
+                    ]
+                else:
+                    subtitle_args = []
                 cmd = [
-                    ffmpeg_exe,
+                    self._ffmpeg_exe,
                     '-y',
                     '-loop', '1',
+                    '-framerate', str(self.fps),
                     '-i', str(image_path),
-                    '-c:v', 'libx264',
-                    '-tune', 'stillimage',
-                    '-pix_fmt', 'yuv420p',
+                    *subtitle_args,
+                    *self._video_codec_args(),
                     '-t', str(duration),
-                    '-vf', filter_chain,
+                    *filter_args,
                     '-movflags', '+faststart',
                     str(output_path)
                 ]
+                
+                print(f"Running FFmpeg (captions={has_captions})...")
+                
+                returncode, _, stderr = await self._run_encode(cmd)
+                
+                if returncode == 0 and output_path.exists():
+                    return True
+                print(f"FFmpeg error: {stderr[:500] if stderr else 'Unknown'}")
+                return await self._create_simple_video(
+                    image_path, None, output_path, duration
+                )
             
-            print(f"Running FFmpeg (captions={subtitle_path is not None})...")
+            # -shortest would also stop at the last caption cue, so the narrated
+            # video is made first and captions are added in a stream-copy pass
+            av_path = output_path.with_name(f"{output_path.stem}_av.mp4") if has_captions else output_path
             
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            )
+            if not await self._encode_with_audio(
+                image_path, audio_path, av_path, duration, ken_burns, filter_args,
+                audio_duration
+            ):
+                return False
             
-            if result.returncode == 0 and output_path.exists():
-                return True
-            else:
-                print(f"FFmpeg error: {result.stderr[:500] if result.stderr else 'Unknown'}")
-                # Try without captions if that was the issue
-                if subtitle_path:
-                    print("Retrying without captions...")
-                    return await self._create_video_ffmpeg(
-                        image_path, audio_path, None, output_path, duration
-                    )
-                return await self._create_simple_video(
-                    image_path, audio_path, output_path, duration
-                )
+            if has_captions:
+                if await self._add_captions(av_path, subtitle_path, output_path):
+                    av_path.unlink(missing_ok=True)
+                else:
+                    print("Adding captions failed, keeping the video without them")
+                    os.replace(av_path, output_path)
+            
+            return True
                 
         except Exception as e:
             print(f"FFmpeg video creation failed: {e}")
             return False
     
+    async def _encode_with_audio(
+        self,
+        image_path: Path,
+        audio_path: Path,
+        output_path: Path,
+        duration: float,
+        ken_burns: bool,
+        filter_args: list,
+        audio_duration: Optional[float]
+    ) -> bool:
+        """Create the narrated video, ending when the narration ends."""
+        # A still frame's track depends only on the image, so it is encoded
+        # once and muxed with each narration by stream copy. The mux is cut
+        # at the probed narration length, so an estimate never truncates it.
+        if (
+            not ken_burns
+            and audio_duration is not None
+            and audio_duration <= SILENT_TRACK_SECONDS
+        ):
+            silent_path = await self._get_silent_video(image_path)
+            if silent_path and await self._mux_audio(
+                silent_path, audio_path, output_path, audio_duration
+            ):
+                return True
+            print("Silent video reuse failed, encoding in a single pass...")
+        
+        cmd = [
+            self._ffmpeg_exe,
+            '-y',
+            '-loop', '1',
+            '-framerate', str(self.fps),
+            '-i', str(image_path),
+            '-i', str(audio_path),
+            *self._video_codec_args(),
+            '-c:a', 'aac',
+            '-b:a', '192k',
+            *filter_args,
+            '-shortest',
+            '-movflags', '+faststart',
+            str(output_path)
+        ]
+        
+        print("Running FFmpeg...")
+        
+        returncode, _, stderr = await self._run_encode(cmd)
+        
+        if returncode == 0 and output_path.exists():
+            return True
+        print(f"FFmpeg error: {stderr[:500] if stderr else 'Unknown'}")
+        return await self._create_simple_video(
+            image_path, audio_path, output_path, duration
+        )
+    
+    async def _get_silent_video(self, image_path: Path) -> Optional[Path]:
+        """
+        Return a cached video-only track of the still image, SILENT_TRACK_SECONDS
+        long so it covers any narration. Only SILENT_SEGMENT_SECONDS are encoded;
+        the rest is the same segment repeated by stream copy.
+        Reused entries are touched so the temp cleanup keeps them.
+        """
+        digest = hashlib.blake2b(image_path.read_bytes(), digest_size=16).hexdigest()
+        
+        cache_dir = Path(config.TEMP_DIR) / CACHE_DIR_NAME
+        silent_path = cache_dir / f"{digest}_{self._vcodec}_still.mp4"
+        
+        try:
+            os.utime(silent_path)
+            print("Reusing cached silent video")
+            return silent_path
+        except FileNotFoundError:
+            pass
+        
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Encode to unique names, then rename so readers never see a partial file
+        segment_path = cache_dir / f"{uuid.uuid4().hex}_segment.mp4"
+        tmp_path = cache_dir / f"{uuid.uuid4().hex}.mp4"
+        
+        encode_cmd = [
+            self._ffmpeg_exe,
+            '-y',
+            '-loop', '1',
+            '-framerate', str(self.fps),
+            '-i', str(image_path),
+            *self._video_codec_args(),
+            '-t', str(SILENT_SEGMENT_SECONDS),
+            '-an',
+            str(segment_path)
+        ]
+        loop_cmd = [
+            self._ffmpeg_exe,
+            '-y',
+            '-stream_loop', str(SILENT_TRACK_SECONDS // SILENT_SEGMENT_SECONDS - 1),
+            '-i', str(segment_path),
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            str(tmp_path)
+        ]
+        
+        try:
+            returncode, _, stderr = await self._run_encode(encode_cmd)
+            if returncode == 0:
+                returncode, _, stderr = await self._run_command(loop_cmd, timeout=300)
+            
+            if returncode == 0 and tmp_path.exists():
+                os.replace(tmp_path, silent_path)
+                return silent_path
+            
+            print(f"Silent video encode failed: {stderr[:500] if stderr else 'Unknown'}")
+        except Exception as e:
+            print(f"Silent video encode failed: {e}")
+        finally:
+            segment_path.unlink(missing_ok=True)
+            tmp_path.unlink(missing_ok=True)
+        return None
+    
+    async def _mux_audio(
+        self,
+        video_path: Path,
+        audio_path: Path,
+        output_path: Path,
+        audio_duration: float
+    ) -> bool:
+        """
+        Combine an encoded video track with narration, copying the video stream.
+        The output is cut at `audio_duration`; -shortest overshoots badly when
+        the copied video track is much longer than the audio.
+        """
+        cmd = [
+            self._ffmpeg_exe,
+            '-y',
+            '-i', str(video_path),
+            '-i', str(audio_path),
+            '-map', '0:v',
+            '-map', '1:a',
+            '-c:v', 'copy',
+            '-c:a', 'aac',
+            '-b:a', '192k',
+            '-t', f"{audio_duration:.3f}",
+            '-movflags', '+faststart',
+            str(output_path)
+        ]
+        
+        returncode, _, stderr = await self._run_command(cmd, timeout=300)
+        
+        if returncode == 0 and output_path.exists():
+            return True
+        
+        print(f"Audio mux failed: {stderr[:500] if stderr else 'Unknown'}")
+        return False
+    
+    async def _add_captions(
+        self,
+        video_path: Path,
+        subtitle_path: Path,
+        output_path: Path
+    ) -> bool:
+        """
+        Add captions to a finished video as a soft mov_text track flagged
+        default so players show them. All other streams are copied.
+        """
+        cmd = [
+            self._ffmpeg_exe,
+            '-y',
+            '-i', str(video_path),
+            '-f', 'srt', '-i', str(subtitle_path),
+            '-map', '0:v',
+            '-map', '0:a',
+            '-map', '1:s',
+            '-c:v', 'copy',
+            '-c:a', 'copy',
+            '-c:s', 'mov_text',
+            '-disposition:s:0', 'default',
+            '-movflags', '+faststart',
+            str(output_path)
+        ]
+        
+        returncode, _, stderr = await self._run_command(cmd, timeout=300)
+        
+        if returncode == 0 and output_path.exists():
+            return True
+        
+        print(f"Caption mux failed: {stderr[:500] if stderr else 'Unknown'}")
+        return False
+    
     async def _create_simple_video(
         self,
         image_path: Path,
@@ -334,46 +720,36 @@ class VideoService:
     ) -> bool:
         """Create simple video without effects (fallback)."""
         try:
-            import imageio_ffmpeg
-            
-            ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-            
             if audio_path and audio_path.exists():
                 cmd = [
-                    ffmpeg_exe,
+                    self._ffmpeg_exe,
                     '-y',
                     '-loop', '1',
+                    '-framerate', str(self.fps),
                     '-i', str(image_path),
                     '-i', str(audio_path),
-                    '-c:v', 'libx264',
-                    '-tune', 'stillimage',
+                    *self._video_codec_args(),
                     '-c:a', 'aac',
-                    '-pix_fmt', 'yuv420p',
                     '-shortest',
                     '-movflags', '+faststart',
                     str(output_path)
                 ]
             else:
                 cmd = [
-                    ffmpeg_exe,
+                    self._ffmpeg_exe,
                     '-y',
                     '-loop', '1',
+                    '-framerate', str(self.fps),
                     '-i', str(image_path),
-                    '-c:v', 'libx264',
-                    '-tune', 'stillimage',
-                    '-pix_fmt', 'yuv420p',
+                    *self._video_codec_args(),
                     '-t', str(duration),
                     '-movflags', '+faststart',
                     str(output_path)
                 ]
             
-            loop = asyncio.get_event_loop()
-            result = await loop.run_in_executor(
-                None,
-                lambda: subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            )
+            returncode, _, _ = await self._run_encode(cmd)
             
-            return result.returncode == 0 and output_path.exists()
+            return returncode == 0 and output_path.exists()
                 
         except Exception as e:
             print(f"Simple video creation failed: {e}")
@@ -381,12 +757,10 @@ class VideoService:
     
     def is_configured(self) -> bool:
         """Check if video generation is available."""
-        try:
-            import imageio_ffmpeg
-            return imageio_ffmpeg.get_ffmpeg_exe() is not None
-        except ImportError:
-            return False
+        return self._has_ffmpeg
 
 
-# Singleton instance
-video_service = VideoService()
+@lru_cache(maxsize=1)
+def get_video_service() -> VideoService:
+    """Return the shared VideoService, created on first use."""
+    return VideoService()
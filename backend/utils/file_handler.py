@@ -9,13 +9,15 @@ import os
 import shutil
 import tempfile
 import time
-import uuid
 from pathlib import Path
 from typing import Optional, List
 from contextlib import contextmanager
 
 from config import config
 
+# Shared cache directory under TEMP_DIR; entries expire individually
+CACHE_DIR_NAME = "silent"
+
 
 class TempFileHandler:
     """
@@ -37,10 +39,7 @@ class TempFileHandler:
         Create a unique session directory for a request.
         Returns the path to the session directory.
         """
-        session_id = str(uuid.uuid4())
-        session_dir = self.base_dir / session_id
-        session_dir.mkdir(parents=True, exist_ok=True)
-        return session_dir
+        return Path(tempfile.mkdtemp(prefix="sess_", dir=self.base_dir))
     
     def get_temp_file_path(self, session_dir: Path, filename: str) -> Path:
         """Get a path for a temporary file within a session directory."""
@@ -56,6 +55,18 @@ class TempFileHandler:
             f.write(data)
         return file_path
     
+    async def save_temp_file_async(self, session_dir: Path, filename: str, data: bytes) -> Path:
+        """
+        Save data to a temporary file without blocking the event loop.
+        Returns the file path.
+        """
+        import aiofiles
+        
+        file_path = self.get_temp_file_path(session_dir, filename)
+        async with aiofiles.open(file_path, 'wb') as f:
+            await f.write(data)
+        return file_path
+    
     def cleanup_session(self, session_dir: Path):
         """
         Remove a session directory and all its contents.
@@ -78,15 +89,31 @@ class TempFileHandler:
         current_time = time.time()
         
         try:
-            for item in self.base_dir.iterdir():
-                if item.is_dir():
+            # scandir entries cache type and stat info from the directory read
+            with os.scandir(self.base_dir) as entries:
+                for entry in entries:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    # The cache dir's mtime changes on every insert, so expire its files instead
+                    if entry.name == CACHE_DIR_NAME:
+                        self._cleanup_cache_dir(entry.path, current_time, max_age_seconds)
+                        continue
                     # Check directory age by modification time
-                    mtime = item.stat().st_mtime
-                    if current_time - mtime > max_age_seconds:
-                        shutil.rmtree(item)
+                    if current_time - entry.stat().st_mtime > max_age_seconds:
+                        shutil.rmtree(entry.path)
         except Exception as e:
             print(f"Warning: Error during cleanup: {e}")
     
+    def _cleanup_cache_dir(self, path: str, current_time: float, max_age_seconds: int):
+        """Remove cache entries not written or reused within max age."""
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if current_time - entry.stat().st_mtime > max_age_seconds:
+                        os.unlink(entry.path)
+                except FileNotFoundError:
+                    pass
+    
     @contextmanager
     def session(self):
         """